@@ -1,6 +1,7 @@
 """AirTasks - Generic background task handling for Air applications."""
 
 from .main import LRULockDict as LRULockDict
+from .main import TaskLogger as TaskLogger
 from .main import run_task_with_lock as run_task_with_lock
 from .main import spawn_task as spawn_task
 
@@ -2,6 +2,7 @@
 
 This module provides reusable components for managing background tasks:
 - LRULockDict: Thread-safe lock management with LRU eviction
+- TaskLogger: Per-run logger that forwards messages to a callback
 - spawn_task: Helper to spawn fire-and-forget background tasks
 - run_task_with_lock: Run task with automatic lock management
 
@@ -9,8 +10,10 @@ Can be used in any Air application that needs background task management.
 """
 
 import asyncio
+import weakref
 from collections import OrderedDict
 from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime
 from typing import Any
 
 from loguru import logger
@@ -23,39 +26,103 @@ class LRULockDict:
     the least recently used locks when the cache reaches max_size.
 
     This prevents unbounded memory growth while ensuring that actively
-    processed resources always have their locks available.
+    processed resources always have their locks available: an evicted lock
+    is only weakly referenced, so it is handed out again for as long as a
+    task still holds or waits on it and is freed once nothing does.
     """
 
     def __init__(self, max_size: int = 2000):
         """Initialize LRU lock dictionary.
 
+        Locks are created on first access rather than up front, and an
+        uncontended asyncio.Lock does not allocate its waiter queue, so the
+        cache only costs memory for resources that have actually been used.
+
         Args:
             max_size: Maximum number of locks to keep in cache.
                      At ~400 bytes per lock, 2000 locks = ~800KB memory.
         """
         self.locks: OrderedDict[int, asyncio.Lock] = OrderedDict()
+        self.evicted: weakref.WeakValueDictionary[int, asyncio.Lock] = (
+            weakref.WeakValueDictionary()
+        )
         self.max_size = max_size
 
     def __getitem__(self, resource_id: int) -> asyncio.Lock:
         """Get lock for resource, creating if needed and evicting LRU if at capacity."""
-        # Move to end (mark as recently used)
-        if resource_id in self.locks:
-            self.locks.move_to_end(resource_id)
-        else:
-            # Create new lock
-            self.locks[resource_id] = asyncio.Lock()
+        lock = self.locks.get(resource_id)
+        if lock is not None:
+            # Mark as recently used
             self.locks.move_to_end(resource_id)
+            return lock
+
+        # Revive an evicted lock that is still in use, else create a new one
+        lock = self.evicted.pop(resource_id, None) or asyncio.Lock()
+        self.locks[resource_id] = lock
+
+        # Evict oldest if over max size
+        if len(self.locks) > self.max_size:
+            oldest_id, oldest_lock = self.locks.popitem(last=False)
+            self.evicted[oldest_id] = oldest_lock
+            logger.warning(
+                f"Evicted lock for resource {oldest_id} from cache "
+                f"(cache size: {len(self.locks)}/{self.max_size})"
+            )
+
+        return lock
+
+
+class TaskLogger:
+    """Logger bound to a single task run.
 
-            # Evict oldest if over max size
-            if len(self.locks) > self.max_size:
-                oldest_id = next(iter(self.locks))
-                del self.locks[oldest_id]
-                logger.warning(
-                    f"Evicted lock for resource {oldest_id} from cache "
-                    f"(cache size: {len(self.locks)}/{self.max_size})"
-                )
+    Forwards each message, tagged with the resource, task type and run ID,
+    to a callback (e.g. one that saves logs to a database) so task progress
+    can be shown to users.
+    """
+
+    __slots__ = ("log_callback", "resource_id", "task_run_id", "task_type")
 
-        return self.locks[resource_id]
+    def __init__(
+        self,
+        resource_id: int,
+        task_type: str,
+        task_run_id: str,
+        log_callback: Callable[[int, str, str, datetime, str, str], Awaitable[Any]],
+    ):
+        """Initialize task logger.
+
+        Args:
+            resource_id: ID of the resource the task is processing
+            task_type: Name of the kind of task being run
+            task_run_id: Unique ID of this task run
+            log_callback: Async function called with (resource_id, task_type,
+                         task_run_id, timestamp, level, message) for each log
+        """
+        self.resource_id = resource_id
+        self.task_type = task_type
+        self.task_run_id = task_run_id
+        self.log_callback = log_callback
+
+    async def log(self, message: str, level: str = "info") -> None:
+        """Send a log message to the callback, timestamped in UTC."""
+        await self.log_callback(
+            self.resource_id,
+            self.task_type,
+            self.task_run_id,
+            datetime.now(UTC),
+            level,
+            message,
+        )
+
+
+def _log_task_exception(task: asyncio.Task) -> None:
+    """Done callback that logs the exception of a failed background task."""
+    try:
+        task.result()
+    except asyncio.CancelledError:
+        pass
+    except Exception as e:
+        logger.exception(f"Background task {task.get_name()} failed: {e}")
 
 
 def spawn_task(coro: Awaitable[Any], name: str | None = None) -> asyncio.Task:
@@ -68,17 +135,8 @@ def spawn_task(coro: Awaitable[Any], name: str | None = None) -> asyncio.Task:
     Returns:
         The created asyncio.Task
     """
-    task = asyncio.create_task(coro, name=name)
-
-    def log_exception(t: asyncio.Task) -> None:
-        try:
-            t.result()
-        except asyncio.CancelledError:
-            pass
-        except Exception as e:
-            logger.exception(f"Background task {name or 'unnamed'} failed: {e}")
-
-    task.add_done_callback(log_exception)
+    task = asyncio.get_running_loop().create_task(coro, name=name)
+    task.add_done_callback(_log_task_exception)
     return task
 
 
@@ -97,5 +155,11 @@ async def run_task_with_lock(
     Returns:
         Result from task_fn
     """
-    async with lock_dict[resource_id]:
+    # Lock.acquire() returns without suspending when the lock is free, so the
+    # uncontended path costs no extra scheduling round-trip
+    lock = lock_dict[resource_id]
+    await lock.acquire()
+    try:
         return await task_fn()
+    finally:
+        lock.release()
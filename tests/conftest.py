@@ -0,0 +1,16 @@
+"""Shared pytest configuration for airtasks tests."""
+
+import pytest
+
+try:
+    import uvloop
+except ImportError:  # uvloop doesn't support Windows
+    uvloop = None
+
+
+if uvloop is not None:
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_asyncio_loop_factories(config, item):
+        """Run async tests on uvloop, the loop uvicorn uses when installed."""
+        return {"uvloop": uvloop.new_event_loop}
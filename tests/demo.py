@@ -5,44 +5,81 @@ Then visit: http://localhost:8000
 """
 
 import asyncio
+import itertools
+from array import array
+from collections import OrderedDict
 
 import air
 
 from airtasks import LRULockDict, run_task_with_lock, spawn_task
 
-# In-memory storage for demo
-task_counters = {"unsafe": 0, "safe": 0}
-task_spawn_counts = {"unsafe": 0, "safe": 0}
-task_results = {"unsafe": [], "safe": []}
+# In-memory storage for demo, indexed by counter type (see _IDX)
+_IDX = {"unsafe": 0, "safe": 1}
+_KINDS = ("unsafe", "safe")
+counters = array("q", [0, 0])
+spawn_counts = array("q", [0, 0])
+# (read, wrote) per task_id, oldest evicted first so memory stays bounded
+results: tuple[OrderedDict[int, tuple[int, int]], ...] = (OrderedDict(), OrderedDict())
+MAX_RESULTS = 1024
 locks = LRULockDict(max_size=500)
+# Queues of the open /events streams, fed each finished task's result
+subscribers: tuple[set[asyncio.Queue], ...] = (set(), set())
+
+# Counter values stay small in this demo, so reuse their string forms
+_SMALL_STR = [str(i) for i in range(4096)]
+
+
+def _s(n: int) -> str:
+    """Return str(n), cached for small non-negative ints."""
+    return _SMALL_STR[n] if 0 <= n < 4096 else str(n)
+
+
+def store_result(idx: int, task_id: int, read: int, wrote: int):
+    """Record what a task read and wrote and push it to open event streams."""
+    task_results = results[idx]
+    task_results[task_id] = (read, wrote)
+    if len(task_results) > MAX_RESULTS:
+        task_results.popitem(last=False)
+
+    if not subscribers[idx]:
+        return
+
+    kind = _KINDS[idx]
+    event = air.Children(
+        air.Div(
+            air.Code(f"Task {task_id}: read {read}, wrote {wrote}"),
+            id="result-" + _s(task_id),
+            hx_swap_oob="true",
+        ),
+        air.Span(_s(spawn_counts[idx]), id=f"{kind}-expected", hx_swap_oob="true"),
+        air.Span(_s(counters[idx]), id=f"{kind}-counter", hx_swap_oob="true"),
+    )
+    for queue in subscribers[idx]:
+        queue.put_nowait(event)
 
 
 async def unsafe_increment_task(task_id: int):
     """Demonstrates race condition without locks."""
-    current = task_counters["unsafe"]
+    current = counters[0]
     await asyncio.sleep(1)  # Simulate work - creates race condition
     new_value = current + 1
-    task_counters["unsafe"] = new_value
+    counters[0] = new_value
 
     # Store what this task read and wrote
-    task_results["unsafe"].append(
-        {"task": task_id, "read": current, "wrote": new_value}
-    )
+    store_result(0, task_id, current, new_value)
 
 
 async def safe_increment_task(task_id: int):
     """Demonstrates safe increment with locks."""
 
     async def do_increment():
-        current = task_counters["safe"]
+        current = counters[1]
         await asyncio.sleep(1)  # Simulate work - but protected by lock
         new_value = current + 1
-        task_counters["safe"] = new_value
+        counters[1] = new_value
 
         # Store what this task read and wrote
-        task_results["safe"].append(
-            {"task": task_id, "read": current, "wrote": new_value}
-        )
+        store_result(1, task_id, current, new_value)
 
     # Use resource_id=1 so all tasks are serialized
     await run_task_with_lock(locks, 1, do_increment)
@@ -52,11 +89,13 @@ async def safe_increment_task(task_id: int):
 app = air.Air()
 
 
-@app.get("/")
-async def index(request: air.Request):
-    """Main demo page."""
+def page(
+    unsafe_expected: str, unsafe_counter: str, safe_expected: str, safe_counter: str
+):
+    """Build the main demo page around the given counter texts."""
     return air.layouts.mvpcss(
         air.Title("AirTasks Demo"),
+        air.Script(src="https://unpkg.com/htmx-ext-sse@2.2.1/sse.js"),
         air.H1("AirTasks Demo"),
         air.P("Demonstrates why locks are needed for concurrent task execution"),
         # Demo 1: Race condition without locks
@@ -69,9 +108,9 @@ async def index(request: air.Request):
             ),
             air.P(
                 "Expected: ",
-                air.Span(str(task_spawn_counts["unsafe"]), id="unsafe-expected"),
+                air.Span(unsafe_expected, id="unsafe-expected"),
                 " | Actual: ",
-                air.Span(str(task_counters["unsafe"]), id="unsafe-counter"),
+                air.Span(unsafe_counter, id="unsafe-counter"),
             ),
             air.Div(
                 air.Button(
@@ -88,6 +127,13 @@ async def index(request: air.Request):
                 ),
             ),
             air.Div(id="unsafe-results"),
+            air.Div(
+                id="unsafe-events",
+                hx_ext="sse",
+                sse_connect="/events/unsafe",
+                sse_swap="message",
+                hx_swap="none",
+            ),
             air.Div(
                 id="unsafe-poller",
                 hx_get="/counter/unsafe",
@@ -105,9 +151,9 @@ async def index(request: air.Request):
             ),
             air.P(
                 "Expected: ",
-                air.Span(str(task_spawn_counts["safe"]), id="safe-expected"),
+                air.Span(safe_expected, id="safe-expected"),
                 " | Actual: ",
-                air.Span(str(task_counters["safe"]), id="safe-counter"),
+                air.Span(safe_counter, id="safe-counter"),
             ),
             air.Div(
                 air.Button(
@@ -124,6 +170,13 @@ async def index(request: air.Request):
                 ),
             ),
             air.Div(id="safe-results"),
+            air.Div(
+                id="safe-events",
+                hx_ext="sse",
+                sse_connect="/events/safe",
+                sse_swap="message",
+                hx_swap="none",
+            ),
             air.Div(
                 id="safe-poller",
                 hx_get="/counter/safe",
@@ -134,101 +187,140 @@ async def index(request: air.Request):
     )
 
 
-task_id_counter = 0
+# Only the four counters vary between requests, so render the page once with
+# sentinels and turn it into a %-format template
+_PAGE_TMPL = (
+    str(page("{{0}}", "{{1}}", "{{2}}", "{{3}}"))
+    .replace("%", "%%")
+    .replace("{{0}}", "%d")
+    .replace("{{1}}", "%d")
+    .replace("{{2}}", "%d")
+    .replace("{{3}}", "%d")
+)
+
+
+@app.get("/")
+async def index(request: air.Request):
+    """Main demo page."""
+    return air.Raw(
+        _PAGE_TMPL % (spawn_counts[0], counters[0], spawn_counts[1], counters[1])
+    )
+
+
+_next_task_id = itertools.count(1).__next__
+
+
+def _counter_idx(counter_type: str) -> int:
+    """Resolve a counter type from the URL to its index, 404ing if unknown."""
+    idx = _IDX.get(counter_type)
+    if idx is None:
+        raise air.HTTPException(status_code=404, detail="Unknown counter type")
+    return idx
+
+
+def pending_result(task_id: int):
+    """Placeholder row that the task's SSE event replaces once it finishes."""
+    return air.Div(air.Code(f"Task {task_id} started"), id="result-" + _s(task_id))
 
 
 @app.post("/spawn/unsafe")
 async def spawn_unsafe(request: air.Request):
     """Spawn unsafe increment task."""
-    global task_id_counter
-    task_id_counter += 1
-    task_id = task_id_counter
-    task_spawn_counts["unsafe"] += 1
+    task_id = _next_task_id()
+    spawn_counts[0] += 1
 
     spawn_task(unsafe_increment_task(task_id), name=f"unsafe-{task_id}")
 
-    return air.Div(
-        air.Code(f"Task {task_id}: "),
-        id=f"result-{task_id}",
-        hx_get=f"/result/{task_id}/unsafe",
-        hx_trigger="load delay:100ms, load delay:600ms, load delay:1200ms",
-    )
+    return pending_result(task_id)
 
 
 @app.post("/spawn-multiple/{counter_type}/{count}")
 async def spawn_multiple(request: air.Request, counter_type: str, count: int):
     """Spawn multiple tasks at once to demonstrate race condition."""
-    global task_id_counter
-    results = []
+    idx = _counter_idx(counter_type)
+    task_ids = [_next_task_id() for _ in range(count)]
+    spawn_counts[idx] += len(task_ids)
 
-    for _ in range(count):
-        task_id_counter += 1
-        task_id = task_id_counter
-        task_spawn_counts[counter_type] += 1
-
-        if counter_type == "unsafe":
-            spawn_task(unsafe_increment_task(task_id), name=f"unsafe-{task_id}")
-        else:
-            spawn_task(safe_increment_task(task_id), name=f"safe-{task_id}")
-
-        results.append(
-            air.Div(
-                air.Code(f"Task {task_id}: "),
-                id=f"result-{task_id}",
-                hx_get=f"/result/{task_id}/{counter_type}",
-                hx_trigger="load delay:100ms, load delay:600ms, load delay:1200ms",
-            )
-        )
+    task_fn = unsafe_increment_task if idx == 0 else safe_increment_task
+    for task_id in task_ids:
+        spawn_task(task_fn(task_id), name=f"{counter_type}-{task_id}")
 
-    return air.Children(*results)
+    return air.Children(*[pending_result(task_id) for task_id in task_ids])
 
 
 @app.post("/spawn/safe")
 async def spawn_safe(request: air.Request):
     """Spawn safe increment task."""
-    global task_id_counter
-    task_id_counter += 1
-    task_id = task_id_counter
-    task_spawn_counts["safe"] += 1
+    task_id = _next_task_id()
+    spawn_counts[1] += 1
 
     spawn_task(safe_increment_task(task_id), name=f"safe-{task_id}")
 
-    return air.Div(
-        air.Code(f"Task {task_id}: "),
-        id=f"result-{task_id}",
-        hx_get=f"/result/{task_id}/safe",
-        hx_trigger="load delay:100ms, load delay:600ms, load delay:1200ms",
-    )
+    return pending_result(task_id)
+
+
+@app.get("/events/{counter_type}")
+async def events(request: air.Request, counter_type: str):
+    """Stream task results and counters as tasks finish."""
+    idx = _counter_idx(counter_type)
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def stream():
+        subscribers[idx].add(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            subscribers[idx].discard(queue)
+
+    return air.SSEResponse(stream())
+
+
+# Poll responses only vary by a few ints, so serve them from bytes templates
+_COUNTER_TMPLS = tuple(
+    (
+        f'<span id="{kind}-expected" hx-swap-oob="true">%d</span>'
+        f'<span id="{kind}-counter" hx-swap-oob="true">%d</span>'
+    ).encode()
+    for kind in _KINDS
+)
+_RESULT_TMPLS = tuple(
+    b"<code>Task %d: read %d, wrote %d</code>" + tmpl for tmpl in _COUNTER_TMPLS
+)
 
 
 @app.get("/result/{task_id}/{counter_type}")
 async def get_result(request: air.Request, task_id: int, counter_type: str):
     """Get result for a specific task."""
+    idx = _counter_idx(counter_type)
+
     # Find the result for this task
-    results = task_results.get(counter_type, [])
-    result = next((r for r in results if r["task"] == task_id), None)
+    result = results[idx].get(task_id)
 
     if not result:
-        return air.Code(f"Task {task_id} started")
+        return air.responses.HTMLResponse(b"<code>Task %d started</code>" % task_id)
 
     # When result is ready, also update the counters
-    actual = task_counters.get(counter_type, 0)
-    expected = task_spawn_counts.get(counter_type, 0)
-
-    return air.Children(
-        air.Code(f"Task {task_id}: read {result['read']}, wrote {result['wrote']}"),
-        air.Span(str(expected), id=f"{counter_type}-expected", hx_swap_oob="true"),
-        air.Span(str(actual), id=f"{counter_type}-counter", hx_swap_oob="true"),
+    read, wrote = result
+    return air.responses.HTMLResponse(
+        _RESULT_TMPLS[idx] % (task_id, read, wrote, spawn_counts[idx], counters[idx])
     )
 
 
 @app.get("/counter/{counter_type}")
 async def get_counter(request: air.Request, counter_type: str):
     """Get current counter value and update display."""
-    actual = task_counters.get(counter_type, 0)
-    expected = task_spawn_counts.get(counter_type, 0)
+    idx = _counter_idx(counter_type)
+    return air.responses.HTMLResponse(
+        _COUNTER_TMPLS[idx] % (spawn_counts[idx], counters[idx])
+    )
+
 
-    return air.Children(
-        air.Span(str(expected), id=f"{counter_type}-expected", hx_swap_oob="true"),
-        air.Span(str(actual), id=f"{counter_type}-counter", hx_swap_oob="true"),
+@app.get("/api/state/{counter_type}")
+async def get_state(request: air.Request, counter_type: str):
+    """Get [expected, actual] for a counter as JSON, for non-htmx clients."""
+    idx = _counter_idx(counter_type)
+    return air.responses.Response(
+        b"[%d,%d]" % (spawn_counts[idx], counters[idx]),
+        media_type="application/json",
     )
@@ -16,6 +16,15 @@ def test_lru_lock_dict_creates_locks():
     assert lock1 is lock2  # Same lock for same ID
 
 
+def test_lru_lock_dict_creates_locks_lazily():
+    """Test that LRULockDict doesn't allocate locks until they are accessed."""
+    locks = LRULockDict(max_size=10)
+    assert len(locks.locks) == 0
+
+    locks[1]
+    assert list(locks.locks) == [1]
+
+
 def test_lru_lock_dict_evicts_old_locks():
     """Test that LRULockDict evicts old locks when max_size is reached."""
     locks = LRULockDict(max_size=2)
@@ -28,6 +37,38 @@ def test_lru_lock_dict_evicts_old_locks():
     assert 3 in locks.locks
 
 
+def test_lru_lock_dict_evicts_least_recently_used():
+    """Test that accessing a lock protects it from the next eviction."""
+    locks = LRULockDict(max_size=2)
+    lock1 = locks[1]
+    locks[2]
+    assert locks[1] is lock1  # Marks ID 1 as recently used
+    locks[3]  # Should evict lock for ID 2
+
+    assert 1 in locks.locks
+    assert 2 not in locks.locks
+    assert 3 in locks.locks
+
+
+def test_lru_lock_dict_reuses_evicted_lock_in_use():
+    """Test that an evicted lock is handed out again while still referenced."""
+    locks = LRULockDict(max_size=1)
+    lock1 = locks[1]
+    locks[2]  # Evicts ID 1 while lock1 is still referenced
+
+    assert 1 not in locks.locks
+    assert locks[1] is lock1
+
+
+def test_lru_lock_dict_drops_unused_evicted_locks():
+    """Test that evicted locks nobody references are freed."""
+    locks = LRULockDict(max_size=1)
+    locks[1]
+    locks[2]  # Evicts ID 1, which nothing else references
+
+    assert 1 not in locks.evicted
+
+
 @pytest.mark.asyncio
 async def test_task_logger_calls_callback():
     """Test that TaskLogger calls the log callback."""
@@ -87,7 +128,7 @@ async def test_run_task_with_lock():
 
     async def task(task_id: int):
         execution_order.append(f"{task_id}-start")
-        await asyncio.sleep(0.1)
+        await asyncio.sleep(0)  # Yield so the other task could interleave
         execution_order.append(f"{task_id}-end")
 
     # Run two tasks on same resource - should be serialized
@@ -109,16 +150,19 @@ async def test_run_task_with_lock_parallel_resources():
     locks = LRULockDict(max_size=10)
     execution_order = []
 
+    barrier = asyncio.Barrier(2)
+
     async def task(task_id: int):
         execution_order.append(f"{task_id}-start")
-        await asyncio.sleep(0.1)
+        await barrier.wait()  # Only passes once both tasks are running
         execution_order.append(f"{task_id}-end")
 
     # Run two tasks on different resources - should be parallel
-    await asyncio.gather(
-        run_task_with_lock(locks, 1, lambda: task(1)),
-        run_task_with_lock(locks, 2, lambda: task(2)),
-    )
+    async with asyncio.timeout(1):
+        await asyncio.gather(
+            run_task_with_lock(locks, 1, lambda: task(1)),
+            run_task_with_lock(locks, 2, lambda: task(2)),
+        )
 
     # Both should start before either ends (parallel execution)
     start_indices = [i for i, x in enumerate(execution_order) if x.endswith("-start")]